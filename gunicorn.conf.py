@@ -0,0 +1,9 @@
+import os
+
+# A single worker keeps one copy of the model and one batching queue in memory;
+# many threads let concurrent requests fill that queue
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 32))
+timeout = 120
@@ -1,12 +1,21 @@
 import os
+
+# Keep native thread pools from contending with the gunicorn request threads.
+# Must be set before numpy (and later TensorFlow) size their pools on import.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
 import sys
+import time
+import threading
 from pathlib import Path
-from flask import Flask, request, jsonify
+from queue import Queue, Empty
+from flask import Flask, Response, request
+import orjson
 import joblib
 import numpy as np
 import zipfile
-from datetime import datetime
-from tensorflow.keras.models import load_model
+from enum import IntEnum
+from functools import lru_cache
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -14,7 +23,21 @@ app = Flask(__name__)
 # Configuration
 BASE_DIR = Path(__file__).parent
 MODEL_DIR = BASE_DIR / "model"
-MODEL_PACKAGE = BASE_DIR / "diabetes_model_package.zip"
+MODEL_PACKAGE = MODEL_DIR / "diabetes_model_package.zip"
+MODEL_PATH = MODEL_DIR / "diabetes_model.h5"
+SCALER_PATH = MODEL_DIR / "scaler.save"
+TFLITE_PATH = MODEL_DIR / "diabetes_model.tflite"
+
+# Micro-batching: requests are grouped into a single model call
+MAX_BATCH = int(os.environ.get("MAX_BATCH", 64))
+MAX_LATENCY_MS = float(os.environ.get("MAX_LATENCY_MS", 20))
+
+# Largest cohort accepted by /api/predict_batch in a single request
+MAX_COHORT = int(os.environ.get("MAX_COHORT", 1024))
+
+# Inference runs on fixed input shapes (XLA recompiles and TFLite reallocates
+# on every new shape), so batches are padded to these sizes
+BATCH_BUCKETS = tuple(sorted({1, 8, MAX_BATCH}))
 
 # Ensure directories exist
 MODEL_DIR.mkdir(exist_ok=True)
@@ -22,50 +45,314 @@ MODEL_DIR.mkdir(exist_ok=True)
 # Global variables for model and scaler
 model = None
 scaler = None
+_infer = None
+_load_failed = False
 
-def load_components():
-    """Load the model and scaler from the package"""
-    global model, scaler
+# Scaler statistics cached as arrays so scaling skips sklearn's validation
+_mean = None
+_inv_scale = None
+
+# Shared queue consumed by the batching worker
+_req_q = Queue()
+_worker_started = False
+
+class PredictionRequest:
+    """A single pending prediction waiting on the batching worker"""
+    __slots__ = ("features", "event", "result", "error")
+
+    def __init__(self, features):
+        self.features = features
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+# Per-thread 1x4 feature buffer reused across requests
+_tls = threading.local()
+
+def _feature_buffer():
+    """Return this thread's preallocated 1x4 float32 feature buffer"""
+    buf = getattr(_tls, 'buf', None)
+    if buf is None:
+        buf = _tls.buf = np.empty((1, 4), dtype=np.float32)
+    return buf
+
+def _batch_worker():
+    """Gather queued requests and run them through the model in one call"""
+    # Worker-owned batch buffer, filled and scaled in place for each batch
+    buf = np.zeros((BATCH_BUCKETS[-1], 4), dtype=np.float32)
+    while True:
+        items = [_req_q.get()]
+        deadline = time.monotonic() + MAX_LATENCY_MS / 1000.0
+        while len(items) < MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                items.append(_req_q.get(timeout=timeout))
+            except Empty:
+                break
+
+        try:
+            n = len(items)
+            size = bucket_size(n)
+            for i, item in enumerate(items):
+                buf[i:i + 1] = item.features
+            batch = buf[:n]
+            np.subtract(batch, _mean, out=batch)
+            np.multiply(batch, _inv_scale, out=batch)
+            buf[n:size] = 0
+            probabilities = _infer(buf[:size])[:n, 0]
+            for item, probability in zip(items, probabilities):
+                item.result = float(probability)
+        except Exception as e:
+            for item in items:
+                item.error = e
+        finally:
+            for item in items:
+                item.event.set()
+
+def import_tensorflow():
+    """Import, configure and return TensorFlow; slow, so only called from the loader thread"""
+    import tensorflow as tf
+
+    # The model is a tiny MLP, so inference runs single-threaded per request
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    # XLA-compile any graphs TF builds outside the explicit inference function
+    tf.config.optimizer.set_jit(True)
+    return tf
+
+def _convert_to_tflite(tf, keras_model):
+    """Convert the model to float16 TFLite and cache it next to the Keras model"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    tflite_model = converter.convert()
+
+    # Write atomically so a crash never leaves a truncated cache behind; the
+    # cache is only an optimization, so failing to write it is not fatal
+    tmp_path = TFLITE_PATH.with_name(f"{TFLITE_PATH.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(tflite_model)
+        os.replace(tmp_path, TFLITE_PATH)
+    except OSError as e:
+        print(f"× Could not cache TFLite model: {str(e)}", file=sys.stderr)
+        tmp_path.unlink(missing_ok=True)
+    return tflite_model
+
+def _build_interpreters(tf, tflite_model):
+    """One preallocated interpreter per batch bucket, keyed by batch size"""
+    interpreters = {}
+    for size in BATCH_BUCKETS:
+        interp = tf.lite.Interpreter(model_content=tflite_model, num_threads=1)
+        in_idx = interp.get_input_details()[0]['index']
+        out_idx = interp.get_output_details()[0]['index']
+        interp.resize_tensor_input(in_idx, [size, 4])
+        interp.allocate_tensors()
+        interpreters[size] = (interp, in_idx, out_idx)
+    return interpreters
+
+def build_tflite_fn(tf, keras_model):
+    """Serve the model as float16 TFLite, reusing the on-disk cache when fresh"""
+    interpreters = None
+    if TFLITE_PATH.exists() and TFLITE_PATH.stat().st_mtime >= MODEL_PATH.stat().st_mtime:
+        try:
+            interpreters = _build_interpreters(tf, TFLITE_PATH.read_bytes())
+        except Exception as e:
+            print(f"× Cached TFLite model unusable, reconverting: {str(e)}", file=sys.stderr)
+    if interpreters is None:
+        interpreters = _build_interpreters(tf, _convert_to_tflite(tf, keras_model))
+
+    # Interpreters are not thread-safe
+    lock = threading.Lock()
+
+    def infer(x):
+        interp, in_idx, out_idx = interpreters[len(x)]
+        with lock:
+            interp.set_tensor(in_idx, x)
+            interp.invoke()
+            return interp.get_tensor(out_idx)
+
+    return infer
+
+def build_inference_fn(tf, keras_model):
+    """Wrap the model in an XLA-compiled function and warm up each batch bucket"""
+    @tf.function(
+        jit_compile=True,
+        input_signature=[tf.TensorSpec([None, 4], tf.float32)]
+    )
+    def infer(x):
+        return keras_model(x, training=False)
+
+    try:
+        for size in BATCH_BUCKETS:
+            infer(tf.zeros([size, 4]))
+        return lambda x: infer(tf.convert_to_tensor(x, dtype=tf.float32)).numpy()
+    except Exception as e:
+        # XLA is not available on every platform; call the model directly instead
+        print(f"× XLA compilation unavailable, using eager model call: {str(e)}", file=sys.stderr)
+        return lambda x: keras_model(tf.convert_to_tensor(x, dtype=tf.float32), training=False).numpy()
+
+def bucket_size(n):
+    """Smallest batch bucket that fits n rows"""
+    return next(b for b in BATCH_BUCKETS if b >= n)
+
+def run_inference(scaled_features):
+    """Run scaled features through the model, padded to a bucket size"""
+    n = len(scaled_features)
+    if n > MAX_BATCH:
+        return np.concatenate([
+            run_inference(scaled_features[i:i + MAX_BATCH])
+            for i in range(0, n, MAX_BATCH)
+        ])
+    size = bucket_size(n)
+    padded = np.zeros((size, 4), dtype=np.float32)
+    padded[:n] = scaled_features
+    return _infer(padded)[:n, 0]
+
+@lru_cache(maxsize=8192)
+def predict_probability(age, blood_sugar, systolic, diastolic):
+    """Diabetes probability for quantized inputs (years, mg/dL, mmHg)"""
+    # Safe to reuse: this thread blocks until the worker has copied the row out
+    features = _feature_buffer()
+    features[0, 0] = age
+    features[0, 1] = blood_sugar
+    features[0, 2] = systolic
+    features[0, 3] = diastolic
+    req = PredictionRequest(features)
+    _req_q.put(req)
+    req.event.wait()
+    if req.error is not None:
+        raise req.error
+    return req.result
+
+def start_batch_worker():
+    """Start the background batching worker once per process"""
+    global _worker_started
+    if not _worker_started:
+        threading.Thread(target=_batch_worker, daemon=True).start()
+        _worker_started = True
+
+def _do_load():
+    """Import TensorFlow and load the model and scaler from the package"""
+    global model, scaler, _infer, _mean, _inv_scale, _load_failed
     
     try:
-        # Unzip the model package
-        with zipfile.ZipFile(MODEL_PACKAGE, 'r') as zip_ref:
-            zip_ref.extractall(MODEL_DIR)
+        # Unzip the model package unless a previous start already extracted
+        # this version of it (extracted files are stamped with extraction time)
+        package_mtime = MODEL_PACKAGE.stat().st_mtime
+        if not all(
+            path.exists() and path.stat().st_mtime >= package_mtime
+            for path in (MODEL_PATH, SCALER_PATH)
+        ):
+            with zipfile.ZipFile(MODEL_PACKAGE, 'r') as zip_ref:
+                zip_ref.extractall(MODEL_DIR)
         
-        # Load components
-        model = load_model(MODEL_DIR / "diabetes_model.keras")
-        scaler = joblib.load(MODEL_DIR / "scaler.save")
+        tf = import_tensorflow()
+        
+        # Load components (inference only, so skip optimizer reconstruction)
+        loaded_model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+        loaded_scaler = joblib.load(SCALER_PATH)
+        _mean = loaded_scaler.mean_.astype(np.float32)
+        _inv_scale = (1.0 / loaded_scaler.scale_).astype(np.float32)
+        try:
+            _infer = build_tflite_fn(tf, loaded_model)
+        except Exception as e:
+            print(f"× TFLite conversion failed, using TensorFlow model: {str(e)}", file=sys.stderr)
+            _infer = build_inference_fn(tf, loaded_model)
+        predict_probability.cache_clear()
+        start_batch_worker()
         
+        # Publish the model last: endpoints treat it as the readiness flag
+        scaler = loaded_scaler
+        model = loaded_model
+        _load_failed = False
         print("✓ Medical model loaded successfully")
-        return True
         
     except Exception as e:
         print(f"× Error loading components: {str(e)}", file=sys.stderr)
         model = None
         scaler = None
-        return False
+        _infer = None
+        _mean = None
+        _inv_scale = None
+        _load_failed = True
+
+def load_components():
+    """Load the model and scaler in the background so the server binds immediately"""
+    thread = threading.Thread(target=_do_load, daemon=True)
+    thread.start()
+    return thread
+
+_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _stringify_big_ints(obj):
+    """Copy of obj with integers outside orjson's 64-bit range turned into strings"""
+    if isinstance(obj, dict):
+        return {key: _stringify_big_ints(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_stringify_big_ints(value) for value in obj]
+    if isinstance(obj, int) and not -2 ** 63 <= obj < 2 ** 64:
+        return str(obj)
+    return obj
+
+def json_response(payload, status=200):
+    """Serialize a response body with orjson (NaN is written as null)"""
+    try:
+        body = orjson.dumps(payload, option=_JSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        # e.g. a client-supplied patientId beyond 64 bits, which orjson rejects
+        body = orjson.dumps(_stringify_big_ints(payload), option=_JSON_OPTIONS)
+    return Response(body, status=status, mimetype='application/json')
+
+# Timestamp string for the current second, reused across requests
+_iso_cache = [None, ""]
+
+def _iso_now():
+    """Current local time in ISO 8601, formatted at most once per second"""
+    now = int(time.time())
+    if now != _iso_cache[0]:
+        _iso_cache[1] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now))
+        _iso_cache[0] = now
+    return _iso_cache[1]
 
 # Load components when starting
 load_components()
 
 @app.route('/')
 def home():
-    return jsonify({
+    return json_response({
         "status": "active",
         "service": "Clinical Diabetes Prediction API",
         "model_loaded": model is not None,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _iso_now()
+    })
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 503 until the model has finished loading"""
+    if model is None:
+        # Load errors are logged to stderr; don't expose their details here
+        return json_response({
+            "status": "failed" if _load_failed else "loading",
+            "model_loaded": False,
+            "error": "Diagnostic model failed to load" if _load_failed else None
+        }, 503)
+    return json_response({
+        "status": "ready",
+        "model_loaded": True
     })
 
 @app.route('/api/predict', methods=['POST'])
 def predict():
     """Clinical prediction endpoint for healthcare providers"""
     if model is None or scaler is None:
-        return jsonify({
+        return json_response({
             "error": "Diagnostic model not available",
             "status": "error",
             "severity": "critical"
-        }), 503
+        }, 503)
 
     try:
         data = request.get_json()
@@ -73,12 +360,12 @@ def predict():
         # Validate input with medical ranges
         required = ['age', 'bloodSugar', 'systolicBP', 'diastolicBP', 'patientId']
         if not all(field in data for field in required):
-            return jsonify({
+            return json_response({
                 "error": "Missing required clinical data",
                 "missing_fields": [f for f in required if f not in data],
                 "status": "error",
                 "severity": "high"
-            }), 400
+            }, 400)
 
         try:
             # Convert and validate with clinical thresholds
@@ -86,28 +373,23 @@ def predict():
             blood_sugar = float(data['bloodSugar'])
             systolic = float(data['systolicBP'])
             diastolic = float(data['diastolicBP'])
-            
-            if not (0 < age <= 120):
-                raise ValueError("Age must be 0-120 years")
-            if not (20 <= blood_sugar <= 1000):
-                raise ValueError("Blood sugar must be 20-1000 mg/dL")
-            if not (50 <= systolic <= 250):
-                raise ValueError("Systolic BP must be 50-250 mmHg")
-            if not (30 <= diastolic <= 150):
-                raise ValueError("Diastolic BP must be 30-150 mmHg")
+            validate_clinical_values(age, blood_sugar, systolic, diastolic)
                 
         except ValueError as ve:
-            return jsonify({
+            return json_response({
                 "error": "Invalid clinical values",
                 "details": str(ve),
                 "status": "error",
                 "severity": "medium"
-            }), 400
+            }, 400)
 
-        # Prepare features and predict
-        features = np.array([[age, blood_sugar, systolic, diastolic]])
-        scaled_features = scaler.transform(features)
-        probability = float(model.predict(scaled_features)[0][0])
+        # Predict on inputs rounded to clinical precision so repeats hit the cache
+        probability = predict_probability(
+            int(round(age)),
+            int(round(blood_sugar)),
+            int(round(systolic)),
+            int(round(diastolic))
+        )
         is_diabetic = probability > 0.5
         
         # Generate clinical report
@@ -122,26 +404,186 @@ def predict():
             risk_level=risk_level
         )
         
-        return jsonify(report)
+        return json_response(report)
         
     except Exception as e:
-        return jsonify({
+        return json_response({
             "error": "Clinical prediction failed",
             "details": str(e),
             "status": "error",
             "severity": "critical"
-        }), 500
+        }, 500)
+
+@app.route('/api/predict_batch', methods=['POST'])
+def predict_batch():
+    """Batch clinical prediction endpoint for scoring patient cohorts"""
+    if model is None or scaler is None:
+        return json_response({
+            "error": "Diagnostic model not available",
+            "status": "error",
+            "severity": "critical"
+        }, 503)
+
+    try:
+        data = request.get_json()
+        patients = data.get('patients') if isinstance(data, dict) else None
+        if not isinstance(patients, list) or not patients:
+            return json_response({
+                "error": "Expected a non-empty 'patients' list",
+                "status": "error",
+                "severity": "high"
+            }, 400)
+        if len(patients) > MAX_COHORT:
+            return json_response({
+                "error": f"Cohort exceeds the maximum of {MAX_COHORT} patients per request",
+                "status": "error",
+                "severity": "high"
+            }, 413)
+
+        # Validate input with medical ranges
+        required = ['age', 'bloodSugar', 'systolicBP', 'diastolicBP', 'patientId']
+        missing = {
+            i: [f for f in required if not isinstance(patient, dict) or f not in patient]
+            for i, patient in enumerate(patients)
+            if not isinstance(patient, dict) or not all(field in patient for field in required)
+        }
+        if missing:
+            return json_response({
+                "error": "Missing required clinical data",
+                "missing_fields": missing,
+                "status": "error",
+                "severity": "high"
+            }, 400)
+
+        # Keep full-precision values for validation and reporting
+        values = []
+        for i, patient in enumerate(patients):
+            try:
+                values.append((
+                    float(patient['age']),
+                    float(patient['bloodSugar']),
+                    float(patient['systolicBP']),
+                    float(patient['diastolicBP'])
+                ))
+            except (TypeError, ValueError) as ve:
+                return json_response({
+                    "error": "Invalid clinical values",
+                    "details": f"Patient {i}: {ve}",
+                    "status": "error",
+                    "severity": "medium"
+                }, 400)
+
+        features = np.array(values, dtype=np.float64)
+        invalid = find_invalid_rows(features)
+        if invalid:
+            return json_response({
+                "error": "Invalid clinical values",
+                "details": f"{len(invalid)} patient(s) outside clinical ranges",
+                "invalid_patients": invalid,
+                "status": "error",
+                "severity": "medium"
+            }, 400)
+
+        # Score the whole cohort in a single model call, on inputs rounded to
+        # clinical precision exactly as /api/predict does
+        quantized = np.rint(features).astype(np.float32)
+        probabilities = run_inference((quantized - _mean) * _inv_scale)
+
+        reports = []
+        for patient, (age, blood_sugar, systolic, diastolic), probability in zip(
+            patients, values, probabilities.tolist()
+        ):
+            reports.append(generate_clinical_report(
+                patient_id=patient['patientId'],
+                age=age,
+                blood_sugar=blood_sugar,
+                systolic=systolic,
+                diastolic=diastolic,
+                probability=probability,
+                risk_level=get_risk_level(probability)
+            ))
+
+        return json_response(reports)
+
+    except Exception as e:
+        return json_response({
+            "error": "Clinical prediction failed",
+            "details": str(e),
+            "status": "error",
+            "severity": "critical"
+        }, 500)
+
+# Clinical ranges per feature column (age, blood sugar, systolic, diastolic);
+# the single source of truth for both prediction endpoints
+_CLINICAL_LOW = np.array([0, 20, 50, 30], dtype=np.float64)
+_CLINICAL_HIGH = np.array([120, 1000, 250, 150], dtype=np.float64)
+_LOW_INCLUSIVE = np.array([False, True, True, True])
+_CLINICAL_RANGE_ERRORS = (
+    "Age must be 0-120 years",
+    "Blood sugar must be 20-1000 mg/dL",
+    "Systolic BP must be 50-250 mmHg",
+    "Diastolic BP must be 30-150 mmHg"
+)
+
+def find_invalid_rows(features):
+    """Range-check an (N, 4) feature matrix, mapping bad row indices to errors"""
+    in_range = (
+        np.where(_LOW_INCLUSIVE, features >= _CLINICAL_LOW, features > _CLINICAL_LOW)
+        & (features <= _CLINICAL_HIGH)
+    )
+    bad_rows = np.flatnonzero(~in_range.all(axis=1))
+    return {
+        int(i): [_CLINICAL_RANGE_ERRORS[j] for j in np.flatnonzero(~in_range[i])]
+        for i in bad_rows
+    }
+
+def validate_clinical_values(age, blood_sugar, systolic, diastolic):
+    """Check vitals against clinical thresholds, raising ValueError if out of range"""
+    invalid = find_invalid_rows(np.array([[age, blood_sugar, systolic, diastolic]], dtype=np.float64))
+    if invalid:
+        raise ValueError(invalid[0][0])
+
+class Risk(IntEnum):
+    """Medical risk strata, usable as an index into the lookup tables below"""
+    LOW = 0
+    MOD = 1
+    HIGH = 2
+    VHIGH = 3
+
+_RISK_LABELS = ("Low Risk", "Moderate Risk", "High Risk", "Very High Risk")
+
+_INTERPRETATION = (
+    "Minimal diabetes risk markers detected",
+    "Early metabolic dysregulation indicators present",
+    "Strong evidence of prediabetes/diabetes",
+    "Urgent diabetes probability with complications risk"
+)
 
 def get_risk_level(probability):
     """Medical risk stratification"""
-    if probability < 0.3:
-        return "Low Risk"
-    elif 0.3 <= probability < 0.6:
-        return "Moderate Risk"
-    elif 0.6 <= probability < 0.8:
-        return "High Risk"
-    else:
-        return "Very High Risk"
+    # Count down from the top so a NaN output fails high, as the if/elif ladder did
+    return Risk(3 - int(probability < 0.8) - int(probability < 0.6) - int(probability < 0.3))
+
+# Fixed shape of the clinical report; key order here is the response order
+_REPORT_TEMPLATE = {
+    "patientId": None,
+    "assessment": {
+        "status": None,
+        "probability": None,
+        "confidence": None,
+        "riskStratification": None,
+        "interpretation": None,
+        "biomarkers": {
+            "age": None,
+            "bloodSugar": None,
+            "bloodPressure": None,
+            "bmi": "Not provided"  # Can be added to input
+        }
+    },
+    "clinicalActions": None,
+    "timestamp": None,
+    "modelVersion": "1.0-clinical"
+}
 
 def generate_clinical_report(patient_id, age, blood_sugar, systolic, diastolic, probability, risk_level):
     """Generate comprehensive clinical report"""
@@ -149,136 +591,140 @@ def generate_clinical_report(patient_id, age, blood_sugar, systolic, diastolic,
     confidence = probability * 100 if is_diabetic else (1 - probability) * 100
     
     # Medical interpretation
-    if risk_level == "Low Risk":
-        interpretation = "Minimal diabetes risk markers detected"
-    elif risk_level == "Moderate Risk":
-        interpretation = "Early metabolic dysregulation indicators present"
-    elif risk_level == "High Risk":
-        interpretation = "Strong evidence of prediabetes/diabetes"
-    else:
-        interpretation = "Urgent diabetes probability with complications risk"
+    interpretation = _INTERPRETATION[risk_level]
     
     # Doctor-focused recommendations
     recommendations = {
-        "diagnostic": get_diagnostic_recommendations(risk_level, blood_sugar),
-        "therapeutic": get_therapeutic_recommendations(risk_level, age),
+        "diagnostic": get_diagnostic_recommendations(risk_level, blood_sugar > 200),
+        "therapeutic": get_therapeutic_recommendations(risk_level, age > 50),
         "monitoring": get_monitoring_plan(risk_level),
         "referrals": get_specialist_referrals(risk_level)
     }
     
-    return {
-        "patientId": patient_id,
-        "assessment": {
-            "status": "Diabetic" if is_diabetic else "Non-Diabetic",
-            "probability": round(probability, 4),
-            "confidence": round(confidence, 2),
-            "riskStratification": risk_level,
-            "interpretation": interpretation,
-            "biomarkers": {
-                "age": age,
-                "bloodSugar": blood_sugar,
-                "bloodPressure": f"{systolic}/{diastolic} mmHg",
-                "bmi": "Not provided"  # Can be added to input
-            }
-        },
-        "clinicalActions": recommendations,
-        "timestamp": datetime.now().isoformat(),
-        "modelVersion": "1.0-clinical"
-    }
+    # Copy each level of the template, then fill in the per-patient fields
+    report = _REPORT_TEMPLATE.copy()
+    assessment = report["assessment"] = _REPORT_TEMPLATE["assessment"].copy()
+    biomarkers = assessment["biomarkers"] = _REPORT_TEMPLATE["assessment"]["biomarkers"].copy()
 
-def get_diagnostic_recommendations(risk_level, blood_sugar):
+    report["patientId"] = patient_id
+    assessment["status"] = "Diabetic" if is_diabetic else "Non-Diabetic"
+    assessment["probability"] = round(probability, 4)
+    assessment["confidence"] = round(confidence, 2)
+    assessment["riskStratification"] = _RISK_LABELS[risk_level]
+    assessment["interpretation"] = interpretation
+    biomarkers["age"] = age
+    biomarkers["bloodSugar"] = blood_sugar
+    biomarkers["bloodPressure"] = f"{systolic}/{diastolic} mmHg"
+    report["clinicalActions"] = recommendations
+    report["timestamp"] = _iso_now()
+    return report
+
+@lru_cache(maxsize=None)
+def get_diagnostic_recommendations(risk_level, high_blood_sugar):
     """Evidence-based diagnostic recommendations"""
     recommendations = []
     
-    if risk_level in ["High Risk", "Very High Risk"]:
+    if risk_level >= Risk.HIGH:
         recommendations.extend([
             "Order HbA1c test immediately",
             "Fasting plasma glucose test",
             "Oral glucose tolerance test",
             "Urinalysis for ketones if blood sugar > 240 mg/dL"
         ])
-    elif risk_level == "Moderate Risk":
+    elif risk_level == Risk.MOD:
         recommendations.extend([
             "Repeat fasting blood glucose",
             "Consider HbA1c screening",
             "Assess for metabolic syndrome"
         ])
     
-    if blood_sugar > 200:
+    if high_blood_sugar:
         recommendations.append("Point-of-care glucose confirmation")
     
-    return recommendations
+    return tuple(recommendations)
 
-def get_therapeutic_recommendations(risk_level, age):
+@lru_cache(maxsize=None)
+def get_therapeutic_recommendations(risk_level, over_50):
     """Personalized treatment recommendations"""
     recommendations = [
         "Lifestyle modification counseling"
     ]
     
-    if risk_level in ["High Risk", "Very High Risk"]:
+    if risk_level >= Risk.HIGH:
         recommendations.extend([
             "Consider metformin therapy",
             "Initiate statin if LDL > 100 mg/dL",
             "ACE inhibitor/ARB if hypertensive"
         ])
         
-        if age > 50:
+        if over_50:
             recommendations.append("Aspirin therapy consideration")
     
-    if risk_level == "Very High Risk":
+    if risk_level == Risk.VHIGH:
         recommendations.extend([
             "Immediate diabetes education referral",
             "Consider GLP-1 RA or SGLT2 inhibitor",
             "Comprehensive foot exam"
         ])
     
-    return recommendations
+    return tuple(recommendations)
+
+# Monitoring frequency by risk level
+_ROUTINE_MONITORING = {
+    "glucose": "Annual screening",
+    "a1c": "Consider baseline",
+    "bp": "Routine monitoring",
+    "weight": "Annual assessment"
+}
+
+_MONITORING = (
+    _ROUTINE_MONITORING,
+    _ROUTINE_MONITORING,
+    {
+        "glucose": "Daily fasting + occasional postprandial",
+        "a1c": "Semi-annual",
+        "bp": "Bi-weekly",
+        "weight": "Monthly"
+    },
+    {
+        "glucose": "4x daily monitoring",
+        "a1c": "Quarterly",
+        "bp": "Weekly",
+        "weight": "Monthly",
+        "retinal": "Annual exam",
+        "renal": "Urine microalbumin now + annual"
+    }
+)
 
 def get_monitoring_plan(risk_level):
     """Monitoring frequency recommendations"""
-    if risk_level == "Very High Risk":
-        return {
-            "glucose": "4x daily monitoring",
-            "a1c": "Quarterly",
-            "bp": "Weekly",
-            "weight": "Monthly",
-            "retinal": "Annual exam",
-            "renal": "Urine microalbumin now + annual"
-        }
-    elif risk_level == "High Risk":
-        return {
-            "glucose": "Daily fasting + occasional postprandial",
-            "a1c": "Semi-annual",
-            "bp": "Bi-weekly",
-            "weight": "Monthly"
-        }
-    else:
-        return {
-            "glucose": "Annual screening",
-            "a1c": "Consider baseline",
-            "bp": "Routine monitoring",
-            "weight": "Annual assessment"
-        }
+    return _MONITORING[risk_level]
+
+# Interdisciplinary referrals by risk level
+_REFERRALS = (
+    ("Registered dietitian",),
+    ("Registered dietitian",),
+    (
+        "Registered dietitian",
+        "Endocrinology consult",
+        "Diabetes educator",
+        "Ophthalmology screening"
+    ),
+    (
+        "Registered dietitian",
+        "Endocrinology consult",
+        "Diabetes educator",
+        "Ophthalmology screening",
+        "Podiatry evaluation",
+        "Cardiology risk assessment"
+    )
+)
 
 def get_specialist_referrals(risk_level):
     """Interdisciplinary care recommendations"""
-    referrals = ["Registered dietitian"]
-    
-    if risk_level in ["High Risk", "Very High Risk"]:
-        referrals.extend([
-            "Endocrinology consult",
-            "Diabetes educator",
-            "Ophthalmology screening"
-        ])
-    
-    if risk_level == "Very High Risk":
-        referrals.extend([
-            "Podiatry evaluation",
-            "Cardiology risk assessment"
-        ])
-    
-    return referrals
+    return _REFERRALS[risk_level]
 
+# Production runs under gunicorn (see gunicorn.conf.py); this is for local use only
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port, debug=False)